@@ -7,11 +7,12 @@
 # this distribution.
 # --
 
-import json
 import uuid
 import threading
 from functools import partial
+from concurrent.futures import ThreadPoolExecutor
 
+import pydantic_core
 from webob.exc import HTTPNotFound, HTTPBadRequest
 
 from nagare import log
@@ -33,13 +34,17 @@ class MCPApp(RESTApp):
         # The size must be a multiple of 3 to ensure that base64
         # encoding doesn't add padding characters ('=') within
         # the stream, only potentially at the very end.
-        'chunk_size': 'integer(default={})'.format(10 * 1024 + 2),
+        'chunk_size': 'integer(default={})'.format(48 * 1024),
+        # Number of threads dispatching concurrently the tool calls of a JSON-RPC batch (0 to dispatch them in turn)
+        'batch_workers': 'integer(default=8)',
     }
     CLIENTS_FACTORY = Client
 
     capabilities = Plugins().load_plugins('capabilities', entry_points='nagare.mcp.capabilities')
 
-    def __init__(self, name, dist, server_name, version, ping_timeout, chunk_size, services_service, **config):
+    def __init__(
+        self, name, dist, server_name, version, ping_timeout, chunk_size, batch_workers, services_service, **config
+    ):
         services_service(
             super().__init__,
             name,
@@ -48,6 +53,7 @@ class MCPApp(RESTApp):
             version=version,
             ping_timeout=ping_timeout,
             chunk_size=chunk_size,
+            batch_workers=batch_workers,
             **config,
         )
 
@@ -64,6 +70,7 @@ class MCPApp(RESTApp):
             rpc_exports={name: capability.rpc_exports for name, capability in self.capabilities.items()}
             | {'initialize': self.initialize},
             chunk_size=chunk_size,
+            executor=ThreadPoolExecutor(batch_workers, 'mcp-batch') if batch_workers else None,
         )
 
         for name, capability in self.capabilities.items():
@@ -92,8 +99,8 @@ class MCPApp(RESTApp):
                 stdio_client = self.clients['stdio'] = self.create_client('stdio')
 
             try:
-                payload = json.loads(stdin)
-            except json.JSONDecodeError:
+                payload = pydantic_core.from_json(stdin)
+            except ValueError:
                 self.logger.error('invalid json RPC: %s', stdin)
                 response = None
             else:
@@ -158,8 +165,8 @@ def handle_json_rpc(self, url, method, request, response, client_id):
         raise HTTPNotFound()
 
     try:
-        payload = request.json_body
-    except json.JSONDecodeError:
+        payload = pydantic_core.from_json(request.body)
+    except ValueError:
         self.logger.error('invalid json RPC: %s', request.body)
         raise HTTPBadRequest()
 
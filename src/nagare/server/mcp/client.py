@@ -12,16 +12,20 @@ import time
 import queue
 import logging
 import collections
-from base64 import b64encode
-from functools import reduce, partial
+from binascii import b2a_base64
+from functools import partial
 from itertools import dropwhile
+from concurrent.futures import Future
 
+import pydantic_core
 from filetype import guess_mime
 
 
 class ClientServices:
+    __slots__ = ('client', 'request_id', 'progress_token', 'roots')
+
     class SamplingMessage(dict):
-        pass
+        __slots__ = ()
 
     @classmethod
     def SamplingText(cls, text, role='user'):
@@ -34,7 +38,7 @@ class ClientServices:
             content={
                 'type': 'image',
                 'mimeType': mime_type or guess_mime(data) or 'application/octet-stream',
-                'data': b64encode(data).decode('ascii'),
+                'data': b2a_base64(data, newline=False).decode('ascii'),
             },
         )
 
@@ -56,17 +60,17 @@ class ClientServices:
         self.roots = roots
 
     def cancel(self, reason=None):
-        params = {'requestId': self.request_id} | ({'reason': reason if reason is not None else {}})
+        params = {'requestId': self.request_id, 'reason': reason if reason is not None else {}}
 
         self.client.send('message', self.client.create_rpc_notification('notifications/cancelled', **params))
 
     def progress(self, progress, total=None, message=None):
         if self.progress_token is not None:
-            params = (
-                {'progressToken': self.progress_token, 'progress': progress}
-                | ({'total': total} if total is not None else {})
-                | ({'message': message} if message is not None else {})
-            )
+            params = {'progressToken': self.progress_token, 'progress': progress}
+            if total is not None:
+                params['total'] = total
+            if message is not None:
+                params['message'] = message
 
             self.client.send('message', self.client.create_rpc_notification('notifications/progress', **params))
 
@@ -104,19 +108,22 @@ class ClientServices:
 
 
 class Client:
+    INVALID_REQUEST = -32600
     METHOD_NOT_FOUND = -32601
     INVALID_PARAMS = -32602
     INTERNAL_ERROR = -32603
 
     CLEANUP_PERIODICITY = 10
+    FLUSH_THRESHOLD = 4 * 1024  # Minimum size of the writes when streaming data
     LOGGING_LEVELS = {
         name: i for i, name in enumerate('debug info notice warning error critical alert emergency'.split())
     }
 
-    def __init__(self, id, parent_logger, rpc_exports, chunk_size):
+    def __init__(self, id, parent_logger, rpc_exports, chunk_size, executor=None):
         self.id = id
         self.logger = logging.getLogger(parent_logger.name + '.client.' + self.id)
         self.chunk_size = chunk_size
+        self.executor = executor  # Shared pool of threads dispatching the tool calls of the batches
 
         self.logging_level = self.LOGGING_LEVELS['error']
         self.roots = set()  # Roots sent by the client
@@ -138,12 +145,22 @@ class Client:
             'logging': {'setLevel': self.set_logging_level},
             'completion': {'complete': self.complete},
         }
+        # Flat `namespace/method` dispatch table
+        self.rpc_methods = dict(self.flatten_exports(self.rpc_exports))
+
+    @classmethod
+    def flatten_exports(cls, exports, prefix=''):
+        for name, export in exports.items():
+            if isinstance(export, dict):
+                yield from cls.flatten_exports(export, prefix + name + '/')
+            else:
+                yield prefix + name, export
 
     def cleanup(self, ping_timeout):
         now = time.time()
 
         if now > (self.last_message_sent + ping_timeout):
-            self.send('message', json.dumps({'jsonrpc': '2.0', 'method': 'ping'}).encode('utf-8'))
+            self.send('message', pydantic_core.to_json({'jsonrpc': '2.0', 'method': 'ping'}))
 
         if now > (self.last_cleanup + self.CLEANUP_PERIODICITY):
             self.last_cleanup = now
@@ -174,11 +191,25 @@ class Client:
                     # Send all the data in one go
                     send(header + data + b'\n\n')
                 else:
-                    # If data is an iterator iterate through its chunks
-                    send(header)
+                    # If data is an iterator iterate through its chunks,
+                    # buffering the small ones to limit the number of writes
+                    buffer = bytearray(header)
                     for chunk in data:
-                        send(chunk)
-                    send(b'\n\n')
+                        if len(chunk) < self.FLUSH_THRESHOLD:
+                            buffer += chunk
+                            if len(buffer) >= self.FLUSH_THRESHOLD:
+                                send(bytes(buffer))
+                                buffer.clear()
+                        else:
+                            # The big chunks are directly sent, after the pending data
+                            if buffer:
+                                send(bytes(buffer))
+                                buffer.clear()
+
+                            send(chunk)
+
+                    buffer += b'\n\n'
+                    send(bytes(buffer))
 
                 self.last_message_sent = time.time()
             finally:
@@ -198,48 +229,63 @@ class Client:
         self.request_id += 1
         self.response_callbacks[self.request_id] = (time.time(), response_callback)
 
-        return json.dumps(
-            {'jsonrpc': '2.0', 'id': self.request_id, 'method': method, 'params': params},
-            separators=(',', ':'),
-        ).encode('utf-8')
+        return pydantic_core.to_json({'jsonrpc': '2.0', 'id': self.request_id, 'method': method, 'params': params})
 
     def create_rpc_notification(self, method, **params):
-        return json.dumps({'jsonrpc': '2.0', 'method': method, 'params': params}, separators=(',', ':')).encode('utf-8')
+        return pydantic_core.to_json({'jsonrpc': '2.0', 'method': method, 'params': params})
+
+    @classmethod
+    def create_rpc_response(cls, response_id, result):
+        return cls.create_rpc_encoded_response(response_id, pydantic_core.to_json(result))
 
     @staticmethod
-    def create_rpc_response(response_id, result):
-        return json.dumps({'jsonrpc': '2.0', 'id': response_id, 'result': result}, separators=(',', ':')).encode(
-            'utf-8'
-        )
+    def create_rpc_encoded_response(response_id, result):
+        return b'{"jsonrpc":"2.0","id":%s,"result":%s}' % (pydantic_core.to_json(response_id), result)
 
     @staticmethod
     def create_rpc_error(response_id, code, message='', data=None):
-        return json.dumps(
-            {
-                'jsonrpc': '2.0',
-                'id': response_id,
-                'error': {'code': code, 'message': message} | ({'data': data} if data is not None else {}),
-            },
-            separators=(',', ':'),
-        ).encode('utf-8')
+        error = {'code': code, 'message': message}
+        if data is not None:
+            error['data'] = data
+
+        return b'{"jsonrpc":"2.0","id":%s,"error":%s}' % (
+            pydantic_core.to_json(response_id),
+            pydantic_core.to_json(error),
+        )
+
+    @staticmethod
+    def encode_text_chunk(chunk):
+        try:
+            return pydantic_core.to_json(chunk)[1:-1]
+        except pydantic_core.PydanticSerializationError:
+            # Lone surrogates can't be encoded in UTF-8 but are escaped by `json`
+            return json.dumps(chunk)[1:-1].encode('ascii')
 
     def create_rpc_streaming_response(self, response_id, streams):
-        yield b'{"jsonrpc": "2.0", "id": %s, "result": {"contents": [' % json.dumps(response_id).encode('utf-8')
+        yield b'{"jsonrpc": "2.0", "id": %s, "result": {"contents": [' % pydantic_core.to_json(response_id)
 
         sep = b''
         for uri, mime_type, stream in streams:
             is_binary_stream = not mime_type.startswith('text/')
 
-            yield b'%s{"uri": "%s", "mimeType": "%s", "%s": "' % (
+            yield b'%s{"uri": %s, "mimeType": %s, "%s": "' % (
                 sep,
-                uri.encode('utf-8'),
-                mime_type.encode('utf-8'),
+                pydantic_core.to_json(uri),
+                pydantic_core.to_json(mime_type),
                 b'blob' if is_binary_stream else b'text',
             )
 
+            if isinstance(stream, (str, bytes)):
+                # In-memory data are directly sliced, without a file-like wrapper.
+                # Binary data are sliced through a memoryview to not copy them before their encoding
+                data = memoryview(stream) if isinstance(stream, bytes) else stream
+                chunks = (data[i : i + self.chunk_size] for i in range(0, len(data), self.chunk_size))
+            else:
+                chunks = iter(partial(stream.read, self.chunk_size), b'' if is_binary_stream else '')
+
             yield from (
-                b64encode(chunk) if is_binary_stream else json.dumps(chunk, separators=(',', ':'))[1:-1].encode('utf-8')
-                for chunk in iter(partial(stream.read, self.chunk_size), b'' if is_binary_stream else '')
+                b2a_base64(chunk, newline=False) if is_binary_stream else self.encode_text_chunk(chunk)
+                for chunk in chunks
             )
             sep = b', '
 
@@ -247,7 +293,43 @@ class Client:
 
         yield b']}}'
 
+    def create_rpc_batch_response(self, responses):
+        yield b'['
+
+        sep = b''
+        for response in responses:
+            yield sep
+            if isinstance(response, bytes):
+                yield response
+            else:
+                yield from response
+            sep = b','
+
+        yield b']'
+
+    def dispatch_batch_message(self, message, services_service):
+        if not isinstance(message, dict):
+            return self.create_rpc_error(None, self.INVALID_REQUEST, 'invalid request')
+
+        # Only the tool calls are dispatched concurrently,
+        # the other messages having effects depending on their order are handled in turn
+        if (self.executor is not None) and (message.get('method', '').replace('.', '/') == 'tools/call'):
+            return self.executor.submit(self.handle_json_rpc, message, services_service)
+
+        return self.handle_json_rpc(message, services_service)
+
     def handle_json_rpc(self, request, services_service):
+        if isinstance(request, list):
+            # Batch of messages, answered by a single array of their responses
+            if not request:
+                return self.create_rpc_error(None, self.INVALID_REQUEST, 'empty batch')
+
+            responses = [self.dispatch_batch_message(message, services_service) for message in request]
+            responses = [response.result() if isinstance(response, Future) else response for response in responses]
+            responses = [response for response in responses if response is not None]
+
+            return self.create_rpc_batch_response(responses) if responses else None
+
         if method := request.get('method', ''):
             params = request.get('params') or {}
 
@@ -275,12 +357,11 @@ class Client:
     # --- JSON-RPC Method Handlers ---
 
     def invoke(self, method, request_id, services_service, **kw):
-        # Follow the `rpc_exports` dictionnaries hierarchy to find the target function
-        f = reduce(lambda d, name: d.get(name, {}), method.split('/'), self.rpc_exports)
+        f = self.rpc_methods.get(method)
 
         return (
             services_service(f, self, request_id, **kw)
-            if callable(f)
+            if f is not None
             else self.create_rpc_error(request_id, self.METHOD_NOT_FOUND, f'rpc method `{method}` not found')
         )
 
@@ -329,6 +410,8 @@ class Client:
 
     def log(self, level, data, logger=None):
         if self.LOGGING_LEVELS[level] >= self.logging_level:
-            params = {'level': level, 'data': data} | ({'logger': logger} if logger is not None else {})
+            params = {'level': level, 'data': data}
+            if logger is not None:
+                params['logger'] = logger
 
             self.send('message', self.create_rpc_notification('notifications/message', **params))
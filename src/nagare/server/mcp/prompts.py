@@ -7,17 +7,19 @@
 # this distribution.
 # --
 
-from base64 import b64encode
+from binascii import b2a_base64
 
+import pydantic_core
 from filetype import guess_mime
+from pydantic import ValidationError
 
 from nagare.services.plugin import Plugin
 
-from .prototypes import jsonschema_to_proto, proto_to_jsonschema
+from .prototypes import proto_to_validator, proto_to_jsonschema
 
 
 class PromptResult(dict):
-    pass
+    __slots__ = ()
 
 
 def PromptText(text, role='user'):
@@ -30,7 +32,7 @@ def PromptImage(data, role='user', mime_type=None):
         content={
             'type': 'image',
             'mimeType': mime_type or guess_mime(data) or 'application/octet-stream',
-            'data': b64encode(data).decode('ascii'),
+            'data': b2a_base64(data, newline=False).decode('ascii'),
         },
     )
 
@@ -42,14 +44,11 @@ def PromptTextResource(uri, text, role='user'):
 
 
 def PromptBlobResource(uri, blob, role='user', mime_type=None):
-    return PromptResult(
-        role=role,
-        content={
-            'type': 'resource',
-            'resource': {'uri': uri, 'blob': b64encode(blob).decode('ascii')}
-            | ({'mimeType': mime_type} if mime_type else {}),
-        },
-    )
+    resource = {'uri': uri, 'blob': b2a_base64(blob, newline=False).decode('ascii')}
+    if mime_type:
+        resource['mimeType'] = mime_type
+
+    return PromptResult(role=role, content={'type': 'resource', 'resource': resource})
 
 
 class Prompts(Plugin, dict):
@@ -57,6 +56,11 @@ class Prompts(Plugin, dict):
 
     INTERNAL_ERROR = -32603
 
+    def __init__(self, name, dist, **config):
+        super().__init__(name, dist, **config)
+
+        self.list_cache = None  # JSON encoded list of the prompts
+
     @property
     def rpc_exports(self):
         return {'list': self.list, 'complete': self.complete, 'get': self.get}
@@ -67,30 +71,32 @@ class Prompts(Plugin, dict):
 
     def register(self, f, name=None, description=None, descriptions=None, completions=None):
         schema = proto_to_jsonschema(f, name, description)
-        proto = jsonschema_to_proto(schema)
-        self[proto.__name__] = (proto, f, description, descriptions or {}, completions or {})
+        self[schema['name']] = (proto_to_validator(f, schema['name']), f, schema, descriptions or {}, completions or {})
+        self.list_cache = None
 
         return f
 
     def list(self, client, request_id, **params):
-        prompts = []
-        for name, (_, f, description, descriptions, _) in sorted(self.items()):
-            schema = proto_to_jsonschema(f, name, description)
-            properties = schema['inputSchema']['properties']
-            required = set(properties.get('required', []))
-
-            prompts.append(
-                {
-                    'name': name,
-                    'description': schema['description'],
-                    'arguments': [
-                        {'name': name, 'required': name in required, 'description': descriptions.get(name, '')}
-                        for name in properties
-                    ],
-                }
-            )
-
-        return client.create_rpc_response(request_id, {'prompts': prompts})
+        if self.list_cache is None:
+            prompts = []
+            for name, (_, _, schema, descriptions, _) in sorted(self.items()):
+                properties = schema['inputSchema']['properties']
+                required = set(schema['inputSchema'].get('required', ()))
+
+                prompts.append(
+                    {
+                        'name': name,
+                        'description': schema['description'],
+                        'arguments': [
+                            {'name': name, 'required': name in required, 'description': descriptions.get(name, '')}
+                            for name in properties
+                        ],
+                    }
+                )
+
+            self.list_cache = pydantic_core.to_json({'prompts': prompts})
+
+        return client.create_rpc_encoded_response(request_id, self.list_cache)
 
     def complete(self, client, request_id, argument, ref, **params):
         name = ref.get('name')
@@ -105,11 +111,11 @@ class Prompts(Plugin, dict):
         if name not in self:
             return client.create_rpc_error(request_id, client.INVALID_PARAMS, 'prompt not found')
 
-        proto, f = self[name][:2]
+        validator, f = self[name][:2]
 
         try:
-            proto(**arguments)
-        except Exception as e:
+            validator.validate_python(arguments)
+        except ValidationError as e:
             return client.create_rpc_error(request_id, client.INVALID_PARAMS, str(e))
 
         try:
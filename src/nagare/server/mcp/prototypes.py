@@ -10,9 +10,12 @@
 import inspect
 import contextlib
 from ast import Expr, Load, Name, Module, Constant, Subscript, FunctionDef, arg, arguments, fix_missing_locations
+from types import FunctionType
 from typing import get_type_hints
+from inspect import CO_VARARGS, CO_VARKEYWORDS
+from functools import lru_cache
 
-from pydantic import Field, BaseModel, errors, json_schema, create_model
+from pydantic import Field, BaseModel, TypeAdapter, errors, json_schema, create_model
 
 JSON_TO_PY_TYPES = {
     'string': 'str',
@@ -23,6 +26,7 @@ JSON_TO_PY_TYPES = {
     'object': 'dict',
 }
 SIMPLE_TYPES = {str, float, int, bool}
+EMPTY = inspect.Parameter.empty
 
 
 class SchemaWithoutTitles(json_schema.GenerateJsonSchema):
@@ -30,30 +34,81 @@ class SchemaWithoutTitles(json_schema.GenerateJsonSchema):
         return False
 
 
-def proto_to_jsonschema(f, name=None, description=None):
-    sig = inspect.signature(f)
-
-    params = {
-        name: (
-            param.annotation if param.annotation is not inspect.Parameter.empty else str,
-            param.default if param.default is not inspect.Parameter.empty else Field(),
-        )
-        for name, param in sig.parameters.items()
+@lru_cache(maxsize=None)
+def cleandoc(doc):
+    return inspect.cleandoc(doc)
+
+
+@lru_cache(maxsize=None)
+def type_hints(cls):
+    # Memoized as the same result types are shared by several functions
+    return get_type_hints(cls)
+
+
+def inspect_function(f):
+    # Return the `(name, annotation, default)` of the parameters and the return annotation of `f`.
+    # Plain functions are directly read from their code object, `inspect.signature()` being used for
+    # all the other callables or when the function has variable arguments or a patched signature
+    code = getattr(f, '__code__', None)
+    if (
+        not isinstance(f, FunctionType)
+        or (code.co_flags & (CO_VARARGS | CO_VARKEYWORDS))
+        or hasattr(f, '__wrapped__')
+        or hasattr(f, '__signature__')
+    ):
+        sig = inspect.signature(f)
+        params = [(name, param.annotation, param.default) for name, param in sig.parameters.items()]
+
+        return params, sig.return_annotation
+
+    nb_args = code.co_argcount
+    names = code.co_varnames[: nb_args + code.co_kwonlyargcount]
+    positional_defaults = f.__defaults__ or ()
+    defaults = dict(zip(names[nb_args - len(positional_defaults) : nb_args], positional_defaults))
+    defaults.update(f.__kwdefaults__ or {})
+    annotations = f.__annotations__
+
+    params = [(name, annotations.get(name, EMPTY), defaults.get(name, EMPTY)) for name in names]
+
+    return params, annotations.get('return', EMPTY)
+
+
+def proto_to_fields(params):
+    return {
+        name: (annotation if annotation is not EMPTY else str, default if default is not EMPTY else Field())
+        for name, annotation, default in params
         if name != 'self' and not name.endswith('_service')
     }
 
+
+def proto_to_validator(f, name):
+    fields = proto_to_fields(inspect_function(f)[0])
+    return TypeAdapter(create_model(name, __config__={'extra': 'forbid'}, **fields))
+
+
+def proto_to_jsonschema(f, name=None, description=None):
+    params, model = inspect_function(f)
+    params = proto_to_fields(params)
+
     input_schema = create_model('', **params).model_json_schema(schema_generator=SchemaWithoutTitles)
     del input_schema['title']
 
     output_schema = {}
-    model = sig.return_annotation
-    if model is not inspect.Signature.empty:
+    if model is not EMPTY:
         if not issubclass(model, BaseModel):
-            if not isinstance(model, type) or not (types := get_type_hints(model)):
+            if not isinstance(model, type) or not (types := type_hints(model)):
                 types = {'result': model}
 
-            required = {name for name in types if not hasattr(model, name)}
-            params = {name: (type_, Field() if name in required else None) for name, type_ in types.items()}
+            # The fields of a named tuple are class attributes, their defaults being kept apart
+            defaults = getattr(model, '_field_defaults', None)
+            if defaults is not None:
+                required = {name for name in types if name not in defaults}
+            else:
+                required = {name for name in types if not hasattr(model, name)}
+                defaults = {}
+            params = {
+                name: (type_, Field() if name in required else defaults.get(name)) for name, type_ in types.items()
+            }
             model = create_model(model.__name__, __config__={'arbitrary_types_allowed': True}, **params)
 
         with contextlib.suppress(errors.PydanticInvalidForJsonSchema):
@@ -61,23 +116,32 @@ def proto_to_jsonschema(f, name=None, description=None):
             if 'additionalProperties' in (result := output_schema['properties'].get('result', {})):
                 output_schema = result
 
-    return (
-        {
-            'name': name or f.__name__,
-            'description': description or inspect.cleandoc(f.__doc__ or ''),
-        }
-        | {'inputSchema': input_schema}
-        | ({'outputSchema': output_schema} if output_schema else {})
-    )
+    schema = {
+        'name': name or f.__name__,
+        'description': description or cleandoc(f.__doc__ or ''),
+        'inputSchema': input_schema,
+    }
+    if output_schema:
+        schema['outputSchema'] = output_schema
+
+    return schema
 
 
 def json_to_py_type(json_type, items):
     if json_type is None:
         return None
 
-    r = Name(py_type, Load()) if (py_type := JSON_TO_PY_TYPES.get(json_type)) else Constant(json_type)
-    if (json_type == 'array') and items:
-        r = Subscript(r, json_to_py_type(items['type'], items.get('items')))
+    # Collect the types of the nested arrays first, then build the AST from the innermost one
+    json_types = [json_type]
+    while (json_type == 'array') and items:
+        json_type, items = items['type'], items.get('items')
+        json_types.append(json_type)
+
+    r = None
+    for json_type in reversed(json_types):
+        py_type = JSON_TO_PY_TYPES.get(json_type)
+        node = Name(py_type, Load()) if py_type else Constant(json_type)
+        r = node if r is None else Subscript(node, r)
 
     return r
 
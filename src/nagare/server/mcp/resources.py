@@ -7,13 +7,17 @@
 # this distribution.
 # --
 
-import io
 import re
 import types
-import inspect
+
+import pydantic_core
 
 from nagare.services.plugin import Plugin
 
+from .prototypes import cleandoc
+
+PARAMETER = re.compile('{(.+?)}')
+
 
 class Resources(Plugin):
     PLUGIN_CATEGORY = 'nagare.applications'
@@ -23,6 +27,13 @@ class Resources(Plugin):
 
         self.concrete_resources = {}
         self.template_resources = {}
+        # Tree of the `/` separated segments of the templates constant prefixes.
+        # Each node is a tuple (children nodes, {constant prefix: templates URIs})
+        self.templates_tree = ({}, {})
+        self.template_regexps = {}  # Lazily combined regexp of each templates group
+
+        # JSON encoded lists of the resources
+        self.concretes_cache = self.templates_cache = None
 
     @property
     def rpc_exports(self):
@@ -40,35 +51,74 @@ class Resources(Plugin):
     def register(self, f, uri=None, name=None, mime_type='text/plain', description=None, completions=None):
         name = name or f.__name__
         uri = uri or name
-        description = description or inspect.cleandoc(f.__doc__ or '')
+        description = description or cleandoc(f.__doc__ or '')
+        self.concretes_cache = self.templates_cache = None
 
-        regexp = re.sub('{(.+?)}', r'(?P<\1>.+?)', uri)
-        if regexp == uri:
+        # Only the URIs with parameters need to be converted into a regexp
+        parts = PARAMETER.split(uri) if '{' in uri else [uri]
+        if len(parts) == 1:
             self.concrete_resources[uri] = (f, name, mime_type, description)
         else:
-            self.template_resources[uri] = (re.compile(regexp), f, name, mime_type, description, completions or {})
+            # Constant parts are escaped and a parameter followed by a `/` only spans one path segment
+            regexp = re.escape(parts[0])
+            for constant in parts[2::2]:
+                regexp += '(%s)%s' % ('[^/]+' if constant.startswith('/') else '.+?', re.escape(constant))
+
+            self.template_resources[uri] = (
+                regexp,
+                parts[1::2],  # Names of the parameters, in the order of their groups
+                f,
+                name,
+                mime_type,
+                description,
+                completions or {},
+            )
+
+            prefix = uri[: uri.index('{')]
+
+            node = self.templates_tree
+            for segment in prefix.split('/')[:-1]:  # Only the complete segments
+                node = node[0].setdefault(segment, ({}, {}))
+
+            templates = node[1].setdefault(prefix, [])
+            if uri not in templates:
+                templates.append(uri)
+
+            self.template_regexps.pop(prefix, None)
 
         return f
 
+    @staticmethod
+    def create_resource_entry(uri_key, uri, name, mime_type, description):
+        entry = {uri_key: uri, 'name': name}
+        if description is not None:
+            entry['description'] = description
+        if mime_type is not None:
+            entry['mimeType'] = mime_type
+
+        return entry
+
     def list_concretes(self, client, request_id, **params):
-        resources = [
-            {'uri': uri, 'name': name}
-            | ({'description': description} if description is not None else {})
-            | ({'mimeType': mime_type} if mime_type is not None else {})
-            for uri, (_, name, mime_type, description) in self.concrete_resources.items()
-        ]
+        if self.concretes_cache is None:
+            resources = [
+                self.create_resource_entry('uri', uri, name, mime_type, description)
+                for uri, (_, name, mime_type, description) in self.concrete_resources.items()
+            ]
+
+            self.concretes_cache = pydantic_core.to_json({'resources': resources})
 
-        return client.create_rpc_response(request_id, {'resources': resources})
+        return client.create_rpc_encoded_response(request_id, self.concretes_cache)
 
     def list_templates(self, client, request_id, **params):
-        resources = [
-            {'uriTemplate': uri, 'name': name}
-            | ({'description': description} if description is not None else {})
-            | ({'mimeType': mime_type} if mime_type is not None else {})
-            for uri, (_, _, name, mime_type, description, _) in self.template_resources.items()
-        ]
+        if self.templates_cache is None:
+            resources = [
+                self.create_resource_entry('uriTemplate', uri, name, mime_type, description)
+                for uri, (_, _, _, name, mime_type, description, _) in self.template_resources.items()
+            ]
 
-        return client.create_rpc_response(request_id, {'resourceTemplates': resources})
+            self.templates_cache = pydantic_core.to_json({'resourceTemplates': resources})
+
+        return client.create_rpc_encoded_response(request_id, self.templates_cache)
 
     def complete(self, client, request_id, argument, ref, **params):
         completions = self.template_resources.get(ref.get('uri'), (None,))[-1]
@@ -79,34 +129,80 @@ class Resources(Plugin):
 
         return client.create_rpc_response(request_id, {'completion': {'values': values}})
 
+    def combine_templates(self, templates):
+        # Each template is captured into an outer group, followed by the groups of its parameters.
+        # The `lastindex` of a match is then the outer group of the matching template
+        alternatives = []
+        handlers = {}
+
+        group = 1
+        for template_uri in templates:
+            regexp, params = self.template_resources[template_uri][:2]
+
+            alternatives.append('(%s)' % regexp)
+            handlers[group] = (template_uri, params)
+            group += 1 + len(params)
+
+        return re.compile('|'.join(alternatives)), handlers
+
+    def match_template(self, uri):
+        # Walk down the tree along the URI segments
+        nodes = [self.templates_tree]
+        for segment in uri.split('/'):
+            node = nodes[-1][0].get(segment)
+            if node is None:
+                break
+
+            nodes.append(node)
+
+        # Precedence rule: the templates with the longest constant prefixes are tried first
+        # and, for a same prefix, the templates are tried in their registration order
+        prefixes = sorted(
+            ((prefix, templates) for node in nodes for prefix, templates in node[1].items() if uri.startswith(prefix)),
+            key=lambda prefix: len(prefix[0]),
+            reverse=True,
+        )
+
+        for prefix, templates in prefixes:
+            regexps = self.template_regexps.get(prefix)
+            if regexps is None:
+                regexps = self.template_regexps[prefix] = self.combine_templates(templates)
+
+            regexp, handlers = regexps
+            if match := regexp.fullmatch(uri):
+                group = match.lastindex
+                template_uri, params = handlers[group]
+                _, _, f, name, mime_type, _, _ = self.template_resources[template_uri]
+
+                return template_uri, f, name, mime_type, dict(zip(params, match.groups()[group:]))
+
+        return None
+
     def read(self, client, request_id, uri, services_service, **params):
-        params = {}
-        f, name, mime_type, _ = self.concrete_resources.get(uri, (None,) * 4)
-
-        if f is None:
-            for template_uri, (regexp, f, name, mime_type, _, _) in self.template_resources.items():
-                if match := regexp.fullmatch(uri):
-                    uri = template_uri
-                    params = match.groupdict()
-                    break
-            else:
+        resource = self.concrete_resources.get(uri)
+        if resource is not None:
+            f, name, mime_type, _ = resource
+            params = {}
+        else:
+            match = self.match_template(uri)
+            if match is None:
                 return client.create_rpc_error(request_id, client.INVALID_PARAMS, 'resource not found')
 
+            uri, f, name, mime_type, params = match
+
         try:
             data = services_service(f, uri, name, **params)
+
+            # The streams returned by a generator are all produced here, to report their errors.
+            # Their contents are only read while sent
+            streams = [
+                (uri, mime_type, stream)
+                for stream in (data if isinstance(data, (list, tuple, types.GeneratorType)) else [data])
+            ]
         except Exception as e:
             self.logger.exception(e)
             return client.create_rpc_error(request_id, client.INTERNAL_ERROR, str(e))
 
-        streams = []
-        for stream in data if isinstance(data, (list, tuple, types.GeneratorType)) else [data]:
-            if isinstance(stream, str):
-                stream = io.StringIO(stream)
-            elif isinstance(stream, bytes):
-                stream = io.BytesIO(stream)
-
-            streams.append((uri, mime_type, stream))
-
         return client.create_rpc_streaming_response(request_id, streams)
 
     EXPORTS = []
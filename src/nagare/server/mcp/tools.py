@@ -7,21 +7,33 @@
 # this distribution.
 # --
 
-from base64 import b64encode
+from binascii import b2a_base64
 from operator import attrgetter
+from functools import lru_cache
 from itertools import chain
 
 import pydantic_core
 from filetype import guess_mime
+from pydantic import ValidationError
 
 from nagare.services.plugin import Plugin
 from nagare.services.logging import log
 
-from .prototypes import jsonschema_to_proto, proto_to_jsonschema
+from .prototypes import proto_to_validator, proto_to_jsonschema
+
+MIME_SIGNATURE_SIZE = 8192  # Number of leading bytes `filetype` looks at
 
 
 class ToolResult(dict):
-    pass
+    __slots__ = ()
+
+
+CONTENT_TYPES = (str, ToolResult, list, tuple)
+
+
+@lru_cache(maxsize=256)
+def guess_mime_type(signature):
+    return guess_mime(signature)
 
 
 def ToolText(text):
@@ -31,8 +43,8 @@ def ToolText(text):
 def ToolImage(data, mime_type=None):
     return ToolResult(
         type='image',
-        mimeType=mime_type or guess_mime(data) or 'application/octet-stream',
-        data=b64encode(data).decode('ascii'),
+        mimeType=mime_type or guess_mime_type(bytes(data[:MIME_SIGNATURE_SIZE])) or 'application/octet-stream',
+        data=b2a_base64(data, newline=False).decode('ascii'),
     )
 
 
@@ -41,15 +53,21 @@ def ToolTextResource(uri, text):
 
 
 def ToolBlobResource(uri, blob, mime_type=None):
-    return ToolResult(
-        type='resource',
-        resource={'uri': uri, 'blob': b64encode(blob).decode('ascii')} | ({'mimeType': mime_type} if mime_type else {}),
-    )
+    resource = {'uri': uri, 'blob': b2a_base64(blob, newline=False).decode('ascii')}
+    if mime_type:
+        resource['mimeType'] = mime_type
+
+    return ToolResult(type='resource', resource=resource)
 
 
 class Tools(Plugin, dict):
     PLUGIN_CATEGORY = 'nagare.applications'
 
+    def __init__(self, name, dist, **config):
+        super().__init__(name, dist, **config)
+
+        self.list_cache = None  # JSON encoded list of the tools
+
     @property
     def rpc_exports(self):
         return {'list': self.list, 'call': self.call}
@@ -60,28 +78,39 @@ class Tools(Plugin, dict):
 
     def register(self, f, name=None, description=None):
         schema = proto_to_jsonschema(f, name, description)
-        proto = jsonschema_to_proto(schema)
-        self[proto.__name__] = (proto, 'outputSchema' in schema, f, description)
+        self[schema['name']] = (proto_to_validator(f, schema['name']), 'outputSchema' in schema, f, schema)
+        self.list_cache = None
 
         return f
 
     def list(self, client, request_id, **params):
-        schemas = [proto_to_jsonschema(f, name, description) for name, (_, _, f, description) in sorted(self.items())]
+        if self.list_cache is None:
+            schemas = [schema for _, (_, _, _, schema) in sorted(self.items())]
+            self.list_cache = pydantic_core.to_json({'tools': schemas})
 
-        return client.create_rpc_response(request_id, {'tools': schemas})
+        return client.create_rpc_encoded_response(request_id, self.list_cache)
 
     @classmethod
     def to_content(cls, result):
         if result is None:
             return []
 
-        if not isinstance(result, (str | ToolResult | list | tuple)):
-            result = pydantic_core.to_json(result, fallback=str, indent=2).decode()
+        # Exact types are checked first, `isinstance()` being only needed for their subclasses
+        if type(result) not in CONTENT_TYPES:
+            # A named tuple is a record, not a list of contents
+            if hasattr(result, '_asdict'):
+                result = result._asdict()
+
+            if not isinstance(result, CONTENT_TYPES):
+                result = pydantic_core.to_json(result, fallback=str, indent=2).decode()
+
+        if isinstance(result, ToolResult):
+            return [result]
 
         if isinstance(result, str):
-            result = ToolText(result)
+            return [ToolText(result)]
 
-        return list(chain(*[cls.to_content(item) for item in result])) if isinstance(result, list | tuple) else [result]
+        return list(chain.from_iterable(map(cls.to_content, result)))
 
     @staticmethod
     def create_tool_error(msg):
@@ -93,11 +122,14 @@ class Tools(Plugin, dict):
         response = {'isError': False, 'content': content}
 
         if content and with_structured_content:
+            if hasattr(result, '_asdict'):
+                result = result._asdict()
+
             structured_content = pydantic_core.to_jsonable_python(result, fallback=attrgetter('__dict__'))
             if not isinstance(structured_content, dict):
                 structured_content = {'result': structured_content}
 
-            response |= {'structuredContent': structured_content}
+            response['structuredContent'] = structured_content
 
         return response
 
@@ -105,13 +137,13 @@ class Tools(Plugin, dict):
         arguments = arguments or {}
         log.debug("Calling tool '%s' with %r", name, arguments)
 
-        proto, with_structured_content, f, _ = self.get(name, (None,) * 4)
-        if proto is None:
+        validator, with_structured_content, f, _ = self.get(name, (None,) * 4)
+        if validator is None:
             return client.create_rpc_error(request_id, client.METHOD_NOT_FOUND, 'tool not found')
 
         try:
-            proto(**arguments)
-        except Exception as e:
+            validator.validate_python(arguments)
+        except ValidationError as e:
             return client.create_rpc_error(request_id, client.INVALID_PARAMS, str(e))
 
         try:
@@ -0,0 +1,143 @@
+# --
+# Copyright (c) 2008-2025 Net-ng.
+# All rights reserved.
+#
+# This software is licensed under the BSD License, as described in
+# the file LICENSE.txt, which you should have received as part of
+# this distribution.
+# --
+
+import json
+import inspect
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from nagare.server.mcp.tools import Tools
+from nagare.server.mcp.client import Client
+
+
+class Services:
+    # Minimal services registry, injecting itself as the `services_service` parameter
+
+    def copy(self, **services):
+        return self
+
+    def __call__(self, f, *args, **kw):
+        if 'services_service' in inspect.signature(f).parameters:
+            kw['services_service'] = self
+
+        return f(*args, **kw)
+
+
+def add(a: int, b: int) -> int:
+    return a + b
+
+
+def create_client(executor=None, tools=(add,), **rpc_exports):
+    capability = Tools('tools', None)
+    for tool in tools:
+        capability.register(tool)
+
+    return Client('test', logging.getLogger('test'), {'tools': capability.rpc_exports} | rpc_exports, 1024, executor)
+
+
+def handle_json_rpc(client, request):
+    response = client.handle_json_rpc(request, Services())
+
+    if response is not None:
+        response = json.loads(response if isinstance(response, bytes) else b''.join(response))
+
+    return response
+
+
+def request(request_id, method, **params):
+    return {'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params}
+
+
+def notification(method, **params):
+    return {'jsonrpc': '2.0', 'method': method, 'params': params}
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+
+
+def test_batch():
+    response = handle_json_rpc(
+        create_client(),
+        [
+            request(1, 'tools/call', name='add', arguments={'a': 1, 'b': 2}),
+            notification('notifications/initialized'),
+            request(2, 'ping'),
+        ],
+    )
+
+    assert [message['id'] for message in response] == [1, 2]
+    assert response[0]['result']['structuredContent'] == {'result': 3}
+    assert response[1] == {'jsonrpc': '2.0', 'id': 2, 'result': {}}
+
+
+def test_notifications_batch():
+    assert handle_json_rpc(create_client(), [notification('notifications/initialized')]) is None
+
+
+def test_empty_batch():
+    assert handle_json_rpc(create_client(), []) == {
+        'jsonrpc': '2.0',
+        'id': None,
+        'error': {'code': -32600, 'message': 'empty batch'},
+    }
+
+
+def test_invalid_batch():
+    error = {'jsonrpc': '2.0', 'id': None, 'error': {'code': -32600, 'message': 'invalid request'}}
+
+    assert handle_json_rpc(create_client(), [1, 2]) == [error, error]
+
+
+def test_unknown_method_in_batch():
+    response = handle_json_rpc(create_client(), [request(1, 'unknown'), request(2, 'ping')])
+
+    assert response == [
+        {'jsonrpc': '2.0', 'id': 1, 'error': {'code': -32601, 'message': 'rpc method `unknown` not found'}},
+        {'jsonrpc': '2.0', 'id': 2, 'result': {}},
+    ]
+
+
+def test_concurrent_tool_calls():
+    # Both tools must run at the same time to pass the barrier
+    barrier = threading.Barrier(2, timeout=5)
+
+    def wait(n: int) -> int:
+        barrier.wait()
+        return n
+
+    calls = []
+
+    def record(client, request_id, n):
+        calls.append(n)
+        return client.create_rpc_response(request_id, n)
+
+    client = create_client(ThreadPoolExecutor(2), tools=[wait], test={'record': record})
+    response = handle_json_rpc(
+        client,
+        [
+            request(1, 'tools/call', name='wait', arguments={'n': 1}),
+            request(2, 'test/record', n=2),
+            request(3, 'tools/call', name='wait', arguments={'n': 3}),
+            request(4, 'test/record', n=4),
+        ],
+    )
+
+    assert calls == [2, 4]
+    assert [message['id'] for message in response] == [1, 2, 3, 4]
+    assert response[0]['result']['structuredContent'] == {'result': 1}
+    assert response[1]['result'] == 2
+    assert response[2]['result']['structuredContent'] == {'result': 3}
+    assert response[3]['result'] == 4
+
+
+def test_streamed_lone_surrogates():
+    response = create_client().create_rpc_streaming_response(1, [('test://text', 'text/plain', 'a\udc80b')])
+
+    assert json.loads(b''.join(response))['result']['contents'][0]['text'] == 'a\udc80b'
@@ -0,0 +1,115 @@
+# --
+# Copyright (c) 2008-2025 Net-ng.
+# All rights reserved.
+#
+# This software is licensed under the BSD License, as described in
+# the file LICENSE.txt, which you should have received as part of
+# this distribution.
+# --
+
+import json
+from typing import NamedTuple
+
+from nagare.server.mcp.tools import Tools
+from nagare.server.mcp.prototypes import proto_to_jsonschema
+
+
+# Using NamedTuple for compact records
+class LocationInfo(NamedTuple):
+    latitude: float
+    longitude: float
+    name: str
+
+
+def get_location(address: str) -> LocationInfo:
+    """Get location coordinates."""
+    return LocationInfo(latitude=51.5074, longitude=-0.1278, name='London, UK')
+
+
+class Point(NamedTuple):
+    x: float
+    y: float = 0.0
+
+
+def get_origin() -> Point:
+    """Get the origin."""
+    return Point(0.0)
+
+
+def get_points(n: int) -> list[Point]:
+    """Get points."""
+    return [Point(float(i), float(i * 2)) for i in range(n)]
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+
+
+def test_1():
+    func = get_location
+
+    schema = proto_to_jsonschema(func)
+    response = Tools.create_tool_response('outputSchema' in schema, func('london'))
+    result = {'latitude': 51.5074, 'longitude': -0.1278, 'name': 'London, UK'}
+
+    assert schema == {
+        'description': 'Get location coordinates.',
+        'inputSchema': {
+            'properties': {'address': {'type': 'string'}},
+            'required': ['address'],
+            'type': 'object',
+        },
+        'name': 'get_location',
+        'outputSchema': {
+            'properties': {
+                'latitude': {'type': 'number'},
+                'longitude': {'type': 'number'},
+                'name': {'type': 'string'},
+            },
+            'required': ['latitude', 'longitude', 'name'],
+            'title': 'LocationInfo',
+            'type': 'object',
+        },
+    }
+    content = response['content'][0].pop('text')
+    assert response == {'isError': False, 'content': [{'type': 'text'}], 'structuredContent': result}
+    assert json.loads(content) == result
+
+
+def test_2():
+    func = get_origin
+
+    schema = proto_to_jsonschema(func)
+    response = Tools.create_tool_response('outputSchema' in schema, func())
+    result = {'x': 0.0, 'y': 0.0}
+
+    assert schema['outputSchema'] == {
+        'properties': {
+            'x': {'type': 'number'},
+            'y': {'default': 0.0, 'type': 'number'},
+        },
+        'required': ['x'],
+        'title': 'Point',
+        'type': 'object',
+    }
+    content = response['content'][0].pop('text')
+    assert response == {'isError': False, 'content': [{'type': 'text'}], 'structuredContent': result}
+    assert json.loads(content) == result
+
+
+def test_3():
+    func = get_points
+
+    schema = proto_to_jsonschema(func)
+    response = Tools.create_tool_response('outputSchema' in schema, func(2))
+
+    assert schema['outputSchema']['properties']['result'] == {'items': {'$ref': '#/$defs/Point'}, 'type': 'array'}
+
+    # Each named tuple is rendered as one object in the text contents,
+    # and as an array, as described by the schema, in the structured content
+    contents = [json.loads(content.pop('text')) for content in response['content']]
+    assert contents == [{'x': 0.0, 'y': 0.0}, {'x': 1.0, 'y': 2.0}]
+    assert response == {
+        'isError': False,
+        'content': [{'type': 'text'}, {'type': 'text'}],
+        'structuredContent': {'result': [[0.0, 0.0], [1.0, 2.0]]},
+    }
@@ -0,0 +1,59 @@
+# --
+# Copyright (c) 2008-2025 Net-ng.
+# All rights reserved.
+#
+# This software is licensed under the BSD License, as described in
+# the file LICENSE.txt, which you should have received as part of
+# this distribution.
+# --
+
+import json
+from functools import partial
+
+from nagare.server.mcp.client import Client
+from nagare.server.mcp.prompts import Prompts
+
+
+def greet(name: str, polite: str = 'yes'):
+    """Greet someone."""
+    return 'Hello ' + name
+
+
+class Greeter:
+    def __call__(self, name: str):
+        return 'Hello ' + name
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+
+
+def test_1():
+    prompts = Prompts('prompts', None)
+
+    prompts.register(partial(greet, polite='no'), name='greet_rudely')
+    prompts.register(Greeter(), name='greeter')
+
+    assert sorted(prompts) == ['greet_rudely', 'greeter']
+
+    validator = prompts['greeter'][0]
+    assert validator.validate_python({'name': 'John'}).name == 'John'
+
+
+def test_2():
+    prompts = Prompts('prompts', None)
+    prompts.register(greet, descriptions={'name': 'Who to greet'})
+
+    response = json.loads(prompts.list(Client, 1))
+
+    assert response['result'] == {
+        'prompts': [
+            {
+                'name': 'greet',
+                'description': 'Greet someone.',
+                'arguments': [
+                    {'name': 'name', 'required': True, 'description': 'Who to greet'},
+                    {'name': 'polite', 'required': False, 'description': ''},
+                ],
+            }
+        ]
+    }
@@ -0,0 +1,109 @@
+# --
+# Copyright (c) 2008-2025 Net-ng.
+# All rights reserved.
+#
+# This software is licensed under the BSD License, as described in
+# the file LICENSE.txt, which you should have received as part of
+# this distribution.
+# --
+
+import json
+import logging
+
+from nagare.server.mcp.client import Client
+from nagare.server.mcp.resources import Resources
+
+
+def create_resources(*templates):
+    resources = Resources('resources', None)
+    for template in templates:
+        resources.register(lambda uri, name, **params: '', template, template)
+
+    return resources
+
+
+def read(resources, uri):
+    client = Client('test', logging.getLogger('test'), {}, 1024)
+    response = resources.read(client, 1, uri, lambda f, *args, **kw: f(*args, **kw))
+
+    return json.loads(response if isinstance(response, bytes) else b''.join(response))
+
+
+def matching_template(resources, uri):
+    match = resources.match_template(uri)
+    return match and (match[0], match[-1])
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+
+
+def test_precedence():
+    # The template with the longest constant prefix wins, whatever the registration order
+    for templates in (('a/{x}', 'a/b/{y}'), ('a/b/{y}', 'a/{x}')):
+        resources = create_resources(*templates)
+        assert matching_template(resources, 'a/b/z') == ('a/b/{y}', {'y': 'z'})
+        assert matching_template(resources, 'a/c') == ('a/{x}', {'x': 'c'})
+
+    # Even when the longest prefix doesn't end on a segment boundary
+    for templates in (('a/{x}', 'a/b{y}'), ('a/b{y}', 'a/{x}')):
+        resources = create_resources(*templates)
+        assert matching_template(resources, 'a/bz') == ('a/b{y}', {'y': 'z'})
+        assert matching_template(resources, 'a/cz') == ('a/{x}', {'x': 'cz'})
+
+    # For a same prefix, the first registered template wins
+    resources = create_resources('a/{x}.txt', 'a/{y}')
+    assert matching_template(resources, 'a/q.txt') == ('a/{x}.txt', {'x': 'q'})
+
+    resources = create_resources('a/{y}', 'a/{x}.txt')
+    assert matching_template(resources, 'a/q.txt') == ('a/{y}', {'y': 'q.txt'})
+
+
+def test_escaped_constants():
+    resources = create_resources('db://{id}.json')
+
+    assert matching_template(resources, 'db://42.json') == ('db://{id}.json', {'id': '42'})
+    assert matching_template(resources, 'db://42xjson') is None
+
+
+def test_segments():
+    resources = create_resources('tpl://{x}/sub/{y}')
+
+    # A parameter followed by a `/` only spans one segment, a trailing one can span several
+    assert matching_template(resources, 'tpl://1/sub/2/3') == ('tpl://{x}/sub/{y}', {'x': '1', 'y': '2/3'})
+    assert matching_template(resources, 'tpl://1/2/sub/3') is None
+
+
+def test_shared_prefix():
+    resources = create_resources('a/{x}/b/{y}', 'a/{x}/c/{y}/{z}', 'a/{x}.txt')
+
+    assert matching_template(resources, 'a/1/b/2') == ('a/{x}/b/{y}', {'x': '1', 'y': '2'})
+    assert matching_template(resources, 'a/1/c/2/3') == ('a/{x}/c/{y}/{z}', {'x': '1', 'y': '2', 'z': '3'})
+    assert matching_template(resources, 'a/1.txt') == ('a/{x}.txt', {'x': '1'})
+    assert matching_template(resources, 'a/1/d/2') is None
+
+
+def test_reregistration():
+    resources = create_resources('a/{x}.txt')
+    assert matching_template(resources, 'a/1.json') is None
+
+    # The combined regexp of the prefix is rebuilt with the new template
+    resources.register(lambda uri, name, x: 'json', 'a/{x}.json', 'json')
+    assert matching_template(resources, 'a/1.json') == ('a/{x}.json', {'x': '1'})
+
+    # A template registered again is served by its new function
+    resources.register(lambda uri, name, x: 'txt ' + x, 'a/{x}.txt', 'txt')
+    assert read(resources, 'a/1.txt')['result']['contents'][0]['text'] == 'txt 1'
+
+
+def test_not_found():
+    resources = create_resources('a/{x}.txt')
+
+    assert read(resources, 'a/1.json')['error'] == {'code': -32602, 'message': 'resource not found'}
+
+
+def test_concrete_first():
+    resources = create_resources('a/{x}')
+    resources.register(lambda uri, name: 'concrete', 'a/b', 'b')
+
+    assert read(resources, 'a/b')['result']['contents'][0]['text'] == 'concrete'
+    assert read(resources, 'a/c')['result']['contents'][0]['text'] == ''
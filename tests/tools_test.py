@@ -0,0 +1,64 @@
+# --
+# Copyright (c) 2008-2025 Net-ng.
+# All rights reserved.
+#
+# This software is licensed under the BSD License, as described in
+# the file LICENSE.txt, which you should have received as part of
+# this distribution.
+# --
+
+import json
+import logging
+from functools import partial
+
+from nagare.server.mcp.tools import Tools
+from nagare.server.mcp.client import Client
+
+
+def add(a: int, b: int = 2) -> int:
+    """Add two numbers."""
+    return a + b
+
+
+class Multiplier:
+    def __call__(self, a: int, b: int) -> int:
+        return a * b
+
+
+def call(tools, name, **arguments):
+    client = Client('test', logging.getLogger('test'), {}, 1024)
+
+    return json.loads(tools.call(client, 1, name, lambda f, **kw: f(**kw), arguments=arguments))
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+
+
+def test_call():
+    tools = Tools('tools', None)
+    tools.register(add)
+
+    assert call(tools, 'add', a=1)['result']['structuredContent'] == {'result': 3}
+    assert call(tools, 'add', a=1, b=3)['result']['structuredContent'] == {'result': 4}
+
+
+def test_invalid_arguments():
+    tools = Tools('tools', None)
+    tools.register(add)
+
+    for arguments in ({'a': 1, 'c': 3}, {'b': 3}, {'a': 'one'}):  # Unknown, missing and wrongly typed arguments
+        assert call(tools, 'add', **arguments)['error']['code'] == -32602
+
+
+def test_unknown_tool():
+    assert call(Tools('tools', None), 'add', a=1)['error'] == {'code': -32601, 'message': 'tool not found'}
+
+
+def test_callables():
+    tools = Tools('tools', None)
+    tools.register(partial(add, b=10), name='add10')
+    tools.register(Multiplier(), name='multiply')
+
+    assert call(tools, 'add10', a=1)['result']['structuredContent'] == {'result': 11}
+    assert call(tools, 'multiply', a=2, b=3)['result']['structuredContent'] == {'result': 6}
+    assert call(tools, 'multiply', a=2)['error']['code'] == -32602